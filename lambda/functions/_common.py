@@ -0,0 +1,56 @@
+import logging
+import orjson
+import os
+
+# Nível de log do logger raiz, configurado uma única vez para todos os handlers:
+# vem da configuração de logging da Lambda; TRACE não existe no logging do Python
+logging.getLogger().setLevel(os.environ.get('AWS_LAMBDA_LOG_LEVEL', 'INFO').replace('TRACE', 'DEBUG'))
+
+# Headers CORS padrão
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+    'Content-Type': 'application/json'
+}
+
+_PREFLIGHT_BODY = orjson.dumps({'message': 'OK'}).decode('utf-8')
+
+def is_preflight(event):
+    """Indica se o evento é uma requisição OPTIONS (preflight CORS)"""
+    return event.get('httpMethod') == 'OPTIONS'
+
+def preflight_response():
+    """Resposta padrão para requisições OPTIONS (preflight)"""
+    return {
+        'statusCode': 200,
+        'headers': CORS_HEADERS,
+        'body': _PREFLIGHT_BODY
+    }
+
+def parse_body(event, marker_field):
+    """
+    Extrai o body do evento: string JSON (API Gateway), dict já parseado ou
+    dados direto no evento quando contêm marker_field (teste direto)
+    """
+    # Caminho comum (API Gateway): body em string JSON
+    try:
+        return orjson.loads(event['body'])
+    except (KeyError, TypeError, ValueError):
+        # String inválida é erro real; os demais formatos são de teste direto
+        if isinstance(event.get('body'), str):
+            raise
+        # Body já como dict, dados direto no event (sem wrapper body) ou vazio
+        return event.get('body') or (event if marker_field in event else {})
+
+def create_error_response(message, status_code=400, details=None):
+    """Função helper para criar respostas de erro padronizadas"""
+    body = {'error': message}
+    if details is not None:
+        body['details'] = details
+    
+    return {
+        'statusCode': status_code,
+        'headers': CORS_HEADERS,
+        'body': orjson.dumps(body).decode('utf-8')
+    }
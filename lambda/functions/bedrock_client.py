@@ -1,236 +1,499 @@
 import boto3
+import hashlib
 import json
 import logging
-from typing import Dict, List
+import orjson
+import os
+import re
+import threading
+from botocore.config import Config
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
 
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+
+# Cliente único por ambiente de execução: mantém a conexão TLS aquecida
+# entre invocações da Lambda
+_BEDROCK_CONFIG = Config(
+    retries={'max_attempts': 2, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+    max_pool_connections=20,
+    connect_timeout=3,
+    read_timeout=60
+)
+_BEDROCK = boto3.client('bedrock-runtime', region_name='us-east-1', config=_BEDROCK_CONFIG)
+
+# Tempo máximo que o init da Lambda (limite de 10 s) espera pelo aquecimento
+_WARM_UP_TIMEOUT = 3
+
+def _keyword_pattern(*keywords: str):
+    """Compila uma lista de palavras-chave em uma única busca por substring"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+# Palavras-chave por categoria (busca por substring, então radicais como
+# "regulament" também casam com "regulamentação")
+_CATEGORY_PATTERNS = (
+    ('business', _keyword_pattern('negócio', 'objetivo', 'problema', 'cliente', 'receita', 'benefício', 'impacto')),
+    ('technical', _keyword_pattern('técnico', 'integração', 'sistema', 'api', 'backend', 'internet banking', 'pix')),
+    ('compliance', _keyword_pattern('compliance', 'bacen', 'regulament', 'audit', 'legal', 'segurança')),
+    ('ux', _keyword_pattern('ux', 'tela', 'fluxo', 'usuário', 'interface', 'experiência')),
+    ('operational', _keyword_pattern('operacion', 'suporte', 'monitor', 'erro', 'rollback')),
+)
+
+# Limites da entrevista: no máximo 5 perguntas, e pelo menos 3 antes de
+# encerrar só porque todas as categorias já apareceram nas respostas
+_MAX_QUESTIONS = 5
+_MIN_QUESTIONS = 3
+
+# Palavras-chave do fallback de stakeholders
+_INTERNET_BANKING_KW = _keyword_pattern('internet banking', 'login', 'facial', 'autenticação', 'interface', 'tela')
+_PIX_BACKEND_KW = _keyword_pattern('pix', 'pagamento', 'transação', 'api')
+_COMPLIANCE_KW = _keyword_pattern('segurança', 'facial', 'autenticação', 'biometria')
+_TMS_KW = _keyword_pattern('monitoramento', 'log', 'infraestrutura')
+
+_STOPWORDS = frozenset({'para', 'esta', 'como', 'qual', 'onde', 'quando'})
+_WORD_RE = re.compile(r'\b\w{4,}\b')
+
+def _keywords(text: str) -> frozenset:
+    """Palavras relevantes (4+ letras, sem stopwords) de um texto"""
+    return frozenset(_WORD_RE.findall(text.lower())) - _STOPWORDS
+
+_VALID_AREAS = ("PIX Backend", "Internet Banking", "Compliance", "Financeiro", "Suporte", "TMS", "Produto")
+
+# Ferramenta usada para obter os stakeholders como JSON estruturado
+_STAKEHOLDERS_TOOL = {
+    "name": "submit_stakeholders",
+    "description": "Registra os stakeholders que precisam validar a especificação",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "stakeholders": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "area": {"type": "string", "enum": list(_VALID_AREAS)},
+                        "reason": {"type": "string", "description": "Explicação específica do impacto"},
+                        "priority": {"type": "string", "enum": ["high", "medium", "low"]},
+                        "validation_focus": {"type": "string", "description": "O que especificamente precisa validar"}
+                    },
+                    "required": ["area", "reason", "priority", "validation_focus"]
+                }
+            }
+        },
+        "required": ["stakeholders"]
+    }
+}
+
+# Foco sugerido por número da pergunta e a categoria que ele cobre
+_FOCUS_PLAN = (
+    ('business', "OBJETIVO DE NEGÓCIO: Como esta feature beneficia as casas de apostas (nossos clientes)?"),
+    ('business', "VALOR PARA OKTO: Qual o impacto esperado em receita, retenção ou operação?"),
+    ('technical', "ASPECTOS TÉCNICOS: Quais sistemas OKTO precisam alteração? (PIX Backend, Internet Banking, etc.)"),
+    ('compliance', "COMPLIANCE E SEGURANÇA: Há aspectos regulatórios do BACEN ou requisitos de segurança?"),
+    ('ux', "EXPERIÊNCIA DO USUÁRIO: Como funcionará para diferentes roles (admin/assistant/operador)?"),
+)
+_FALLBACK_FOCUS = "ASPECTOS FINAIS: Há requisitos específicos não mencionados ou dependências críticas?"
+
+def _normalize_text(text: str) -> str:
+    """Remove espaços nas pontas e colapsa espaços/quebras de linha repetidos"""
+    return " ".join(text.split())
+
+def _normalize_inputs(context: str, previous_answers: Dict) -> Tuple[str, Dict]:
+    return _normalize_text(context), {
+        _normalize_text(question): _normalize_text(answer)
+        for question, answer in previous_answers.items()
+    }
+
+# Limites do histórico enviado ao modelo: respostas muito longas (ex.: texto
+# colado) não devem fazer o prompt crescer sem limite
+_MAX_QUESTION_CHARS = 200
+_MAX_ANSWER_CHARS = 500
+
+_JSON_DECODER = json.JSONDecoder()
+
+def _response_text(result: Dict) -> str:
+    """Concatena os blocos de texto de uma resposta do modelo"""
+    return "".join(block.get('text', '') for block in result.get('content', [])).strip()
+
+def _extract_json(text: str) -> Optional[Dict]:
+    """Retorna o primeiro objeto JSON válido do texto, ignorando chaves soltas em explicações"""
+    start = text.find('{')
+    while start != -1:
+        try:
+            data, _ = _JSON_DECODER.raw_decode(text, start)
+            if isinstance(data, dict):
+                return data
+        except json.JSONDecodeError:
+            pass
+        start = text.find('{', start + 1)
+    return None
+
+# Respostas do modelo por hash do corpo da requisição: retries, recargas e
+# regenerações sem alteração na especificação não chamam o Bedrock novamente.
+# O TTL cobre um ciclo típico de revisão
+_RESPONSE_CACHE = TTLCache(maxsize=512, ttl=600)
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+# Pool compartilhado para executar as chamadas bloqueantes do boto3 em paralelo
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# Blocos estáticos dos prompts, enviados como "system" a cada chamada
+_SYSTEM_PROMPT_QUESTION = """
+CONTEXTO DA OKTO:
+- Fintech brasileira para casas de apostas esportivas
+- Sistemas: PIX (chave/QR/dados), pagamentos internos, cobranças, extratos, investimentos, rewards
+- Stack: Next.js, Node.js, Keycloak (2FA), 3 roles (admin/assistant/operador)
+- Times: Produto, PIX Backend, Internet Banking, Compliance, Financeiro, Suporte, TMS
+
+REGRAS CRÍTICAS:
+1. Se já foram feitas 5+ perguntas, responda: "ESPECIFICACAO_COMPLETA"
+2. NUNCA repita perguntas já feitas
+3. Seja específico para o contexto OKTO e casas de apostas
+4. Foque em informações práticas ainda não coletadas
+
+Retorne APENAS a próxima pergunta relevante ou "ESPECIFICACAO_COMPLETA".
+"""
+
+_SYSTEM_PROMPT_STAKEHOLDERS = """
+CONTEXTO DA OKTO:
+- Fintech para casas de apostas esportivas
+- Times: Produto, PIX Backend, Internet Banking, Compliance, Financeiro, Suporte, TMS
+
+STAKEHOLDERS DISPONÍVEIS NA OKTO:
+- PIX Backend: APIs PIX, integrações bancárias, processamento de pagamentos
+- Internet Banking: Frontend, UX, autenticação, menus por role
+- Compliance: Regulamentações BACEN, auditoria, prevenção à lavagem
+- Financeiro: Fluxo de caixa, conciliação, custos operacionais, tarifas
+- Suporte: Atendimento aos clientes (casas de apostas), documentação
+- TMS: Monitoramento, logs, alertas, infraestrutura
+- Produto: Roadmap, priorização, métricas de negócio
+
+REGRAS:
+1. Seja MUITO criterioso - apenas stakeholders realmente impactados
+2. Considere que nossos clientes são casas de apostas
+3. Analise impactos técnicos, regulatórios e operacionais específicos
+4. Explique claramente POR QUE cada área precisa validar
+
+Registre o resultado com a ferramenta submit_stakeholders.
+"""
+
+_SYSTEM_PROMPT_DOCUMENT = """
+Gere um documento de especificação técnica completo para a OKTO.
+
+CONTEXTO OKTO:
+- Fintech para casas de apostas esportivas
+- Stack: Next.js, Node.js, Keycloak 2FA
+- Sistemas: PIX, pagamentos internos, cobranças, extratos, investimentos, rewards
+- Roles: admin, assistant, operador
+
+ESTRUTURA OBRIGATÓRIA (Markdown):
+
+# SPEC-<ID>: <Título>
+
+## 📋 Resumo Executivo
+- **Problema:** [problema específico para casas de apostas]
+- **Solução:** [solução técnica proposta]  
+- **Impacto esperado:** [benefícios quantificados]
+- **Complexidade:** [alta/média/baixa com justificativa]
+
+## 🎯 Objetivos de Negócio
+[objetivos específicos e mensuráveis para o contexto OKTO]
+
+## 👥 Impacto nos Clientes (Casas de Apostas)
+[como beneficia nossos clientes especificamente]
+
+## ⚙️ Especificação Técnica
+
+### Sistemas OKTO Impactados
+[PIX Backend, Internet Banking, BackOffice, etc.]
+
+### Funcionalidades Core
+[lista detalhada das funcionalidades]
+
+### Regras de Negócio
+[regras específicas, limites, validações]
+
+### Integrações Necessárias
+[APIs, serviços externos, sistemas internos]
+
+## 🔒 Compliance e Segurança
+[aspectos BACEN, auditoria, segurança]
+
+## 📱 Experiência do Usuário
+
+### Por Role de Usuário
+- **Admin:** [funcionalidades específicas]
+- **Assistant:** [funcionalidades específicas] 
+- **Operador:** [funcionalidades específicas]
+
+### Fluxos Principais
+[jornadas do usuário]
+
+## 🔧 Considerações Técnicas
+[arquitetura, performance, escalabilidade]
+
+## 📊 Métricas de Sucesso
+[KPIs específicos para medir sucesso]
+
+## ⚠️ Riscos e Mitigações
+[riscos técnicos, de negócio e como mitigar]
+
+## 🚀 Plano de Implementação
+[fases, cronograma, dependências]
+
+Seja específico para o contexto OKTO e casas de apostas. Use informações das respostas fornecidas.
+"""
+
+def _body_template(system_prompt: str, max_tokens: int, **params) -> str:
+    """
+    Serializa uma única vez a parte estática do corpo da requisição,
+    terminando exatamente onde entra o conteúdo da mensagem do usuário
+    """
+    static_json = orjson.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "system": system_prompt,
+        **params
+    }).decode('utf-8')
+    return static_json[:-1] + ',"messages":[{"role":"user","content":'
+
+def _build_body(body_template: str, content: str) -> str:
+    """Completa o template com o conteúdo dinâmico; só ele é serializado por chamada"""
+    return body_template + orjson.dumps(content).decode('utf-8') + '}]}'
+
+_QUESTION_BODY = _body_template(
+    _SYSTEM_PROMPT_QUESTION, 100,
+    stop_sequences=["ESPECIFICACAO_COMPLETA"]
+)
+_STAKEHOLDERS_BODY = _body_template(
+    _SYSTEM_PROMPT_STAKEHOLDERS, 1000,
+    tools=[_STAKEHOLDERS_TOOL],
+    tool_choice={"type": "tool", "name": _STAKEHOLDERS_TOOL['name']}
+)
+_DOCUMENT_BODY = _body_template(_SYSTEM_PROMPT_DOCUMENT, 2500)
+
+# Chamada mínima (1 token) usada só para abrir a conexão no cold start
+_WARM_UP_BODY = orjson.dumps({
+    "anthropic_version": "bedrock-2023-05-31",
+    "max_tokens": 1,
+    "messages": [{"role": "user", "content": "ok"}]
+}).decode('utf-8')
+
+@dataclass(slots=True)
+class SpecData:
+    """Dados de uma especificação concluída, usados para stakeholders e documento final"""
+    spec_id: str
+    title: str
+    initial_idea: str
+    questions_answers: Dict[str, str]
+    completed_at: str
 
 class BedrockClient:
     def __init__(self):
-        self.bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+        self.bedrock = _BEDROCK
         self.model_id = 'anthropic.claude-3-5-sonnet-20240620-v1:0'
     
+    def warm_up(self) -> None:
+        """
+        Abre a conexão do cliente compartilhado com o Bedrock (DNS, TLS e assinatura) antes da
+        primeira requisição real. Só roda dentro da Lambda, para imports locais não chamarem o Bedrock
+        """
+        if not os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+            return
+        
+        # Executado no pool para limitar a espera; se estourar, a chamada segue em segundo plano
+        future = _EXECUTOR.submit(
+            lambda: self.bedrock.invoke_model(modelId=self.model_id, body=_WARM_UP_BODY)['body'].read()
+        )
+        try:
+            future.result(timeout=_WARM_UP_TIMEOUT)
+            logger.info("Conexão com o Bedrock aquecida")
+        except FuturesTimeoutError:
+            logger.warning("Aquecimento da conexão com o Bedrock excedeu %s s", _WARM_UP_TIMEOUT)
+        except Exception as e:
+            logger.warning("Falha ao aquecer conexão com o Bedrock: %s", e)
+    
+    def _cache_key(self, body: str) -> str:
+        return hashlib.blake2b(f"{self.model_id}:{body}".encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _invoke(self, body_template: str, content: str) -> Dict:
+        """Invoca o modelo, reaproveitando respostas já obtidas para o mesmo corpo"""
+        body = _build_body(body_template, content)
+        
+        cache_key = self._cache_key(body)
+        with _RESPONSE_CACHE_LOCK:
+            cached = _RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("Resposta do modelo obtida do cache")
+            return cached
+        
+        response = self.bedrock.invoke_model(modelId=self.model_id, body=body)
+        result = orjson.loads(response['body'].read())
+        
+        with _RESPONSE_CACHE_LOCK:
+            _RESPONSE_CACHE[cache_key] = result
+        return result
+    
+    def finalize(self, specification_data: SpecData) -> Tuple[Dict, str]:
+        """
+        Identifica stakeholders e gera o documento final em paralelo
+        """
+        stakeholders_future = _EXECUTOR.submit(self.identify_stakeholders, specification_data)
+        document_future = _EXECUTOR.submit(self.generate_final_document, specification_data)
+        return stakeholders_future.result(), document_future.result()
+    
     def ask_specification_question(self, context: str, previous_answers: Dict) -> str:
         """
         Gera próxima pergunta baseada no contexto e respostas anteriores
         """
         try:
+            # Entradas que diferem só em espaços geram o mesmo prompt (e a mesma chave de cache)
+            context, previous_answers = _normalize_inputs(context, previous_answers)
+            total_questions = len(previous_answers)
+            
+            # CORREÇÃO: Limitar a 5 perguntas máximo
+            if total_questions >= _MAX_QUESTIONS:
+                return "ESPECIFICACAO_COMPLETA"
+            
             # Montar histórico estruturado (usar os valores, não as chaves)
-            qa_history = ""
+            history_lines = []
             answered_categories = set()
             
             # CORREÇÃO: Usar apenas as respostas para identificar categorias
             for i, (question, answer) in enumerate(previous_answers.items(), 1):
-                qa_history += f"P{i}: {question}\nR{i}: {answer}\n\n"
+                history_lines.append(f"P{i}: {question[:_MAX_QUESTION_CHARS]}\nR{i}: {answer[:_MAX_ANSWER_CHARS]}\n")
                 
                 # Identificar categorias baseado na PERGUNTA E RESPOSTA
                 question_and_answer = (question + " " + answer).lower()
                 
-                if any(word in question_and_answer for word in ['negócio', 'objetivo', 'problema', 'cliente', 'receita', 'benefício', 'impacto']):
-                    answered_categories.add('business')
-                if any(word in question_and_answer for word in ['técnico', 'integração', 'sistema', 'api', 'backend', 'internet banking', 'pix']):
-                    answered_categories.add('technical')
-                if any(word in question_and_answer for word in ['compliance', 'bacen', 'regulament', 'audit', 'legal', 'segurança']):
-                    answered_categories.add('compliance')
-                if any(word in question_and_answer for word in ['ux', 'tela', 'fluxo', 'usuário', 'interface', 'experiência']):
-                    answered_categories.add('ux')
-                if any(word in question_and_answer for word in ['operacion', 'suporte', 'monitor', 'erro', 'rollback']):
-                    answered_categories.add('operational')
+                for category, pattern in _CATEGORY_PATTERNS:
+                    if category not in answered_categories and pattern.search(question_and_answer):
+                        answered_categories.add(category)
 
-            # Determinar próxima categoria necessária
-            total_questions = len(previous_answers)
-            
-            # CORREÇÃO: Limitar a 5 perguntas máximo
-            if total_questions >= 5:
+            # Todas as categorias cobertas: encerrar sem consultar o modelo
+            if total_questions >= _MIN_QUESTIONS and len(answered_categories) == len(_CATEGORY_PATTERNS):
+                logger.info("Todas as categorias cobertas, finalizando especificação")
                 return "ESPECIFICACAO_COMPLETA"
             
+            # Determinar próxima categoria necessária
             next_focus = self._get_next_category_focus(answered_categories, total_questions)
+            qa_history = "".join(history_lines)
             
+            # Apenas dados dinâmicos, do mais estável (feature) ao que muda a cada turno
             prompt = f"""
-CONTEXTO DA OKTO:
-- Fintech brasileira para casas de apostas esportivas
-- Sistemas: PIX (chave/QR/dados), pagamentos internos, cobranças, extratos, investimentos, rewards
-- Stack: Next.js, Node.js, Keycloak (2FA), 3 roles (admin/assistant/operador)
-- Times: Produto, PIX Backend, Internet Banking, Compliance, Financeiro, Suporte, TMS
-
 FEATURE SOLICITADA: {context}
 
 HISTÓRICO COMPLETO:
 {qa_history}
-
 CATEGORIAS JÁ COBERTAS: {list(answered_categories)}
 TOTAL DE PERGUNTAS: {total_questions}
-
 PRÓXIMO FOCO: {next_focus}
-
-REGRAS CRÍTICAS:
-1. Se já foram feitas 5+ perguntas, responda: "ESPECIFICACAO_COMPLETA"
-2. NUNCA repita perguntas já feitas
-3. Seja específico para o contexto OKTO e casas de apostas
-4. Foque em informações práticas ainda não coletadas
-
-Retorne APENAS a próxima pergunta relevante ou "ESPECIFICACAO_COMPLETA".
 """
             
-            response = self.bedrock.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 150,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
+            result = self._invoke(_QUESTION_BODY, prompt)
             
-            result = json.loads(response['body'].read())
-            question = result['content'][0]['text'].strip()
+            # A sequência de parada não vem no texto gerado
+            if result.get('stop_sequence') == "ESPECIFICACAO_COMPLETA":
+                logger.info("Modelo indicou especificação completa")
+                return "ESPECIFICACAO_COMPLETA"
+            
+            question = _response_text(result)
+            if not question:
+                raise ValueError("Resposta vazia do modelo")
             
             # CORREÇÃO: Validação mais rigorosa de repetição
             if self._is_question_repetitive(question, previous_answers):
                 logger.info("Pergunta repetitiva detectada, finalizando especificação")
                 return "ESPECIFICACAO_COMPLETA"
             
-            logger.info(f"Pergunta gerada: {question}")
+            logger.info("Pergunta gerada: %s", question)
             return question
             
         except Exception as e:
-            logger.error(f"Erro ao gerar pergunta: {str(e)}")
+            logger.error("Erro ao gerar pergunta: %s", e)
             return "ESPECIFICACAO_COMPLETA"
     
     def _get_next_category_focus(self, answered_categories: set, total_questions: int) -> str:
         """Determina o foco da próxima pergunta baseado no que já foi coberto"""
+        # A partir da pergunta atual, o primeiro foco cuja categoria ainda não foi coberta
+        for category, focus in _FOCUS_PLAN[total_questions:]:
+            if category not in answered_categories:
+                return focus
         
-        if total_questions == 0:
-            return "OBJETIVO DE NEGÓCIO: Como esta feature beneficia as casas de apostas (nossos clientes)?"
-        
-        if total_questions == 1 and 'business' not in answered_categories:
-            return "VALOR PARA OKTO: Qual o impacto esperado em receita, retenção ou operação?"
-        
-        if total_questions <= 2 and 'technical' not in answered_categories:
-            return "ASPECTOS TÉCNICOS: Quais sistemas OKTO precisam alteração? (PIX Backend, Internet Banking, etc.)"
-        
-        if total_questions <= 3 and 'compliance' not in answered_categories:
-            return "COMPLIANCE E SEGURANÇA: Há aspectos regulatórios do BACEN ou requisitos de segurança?"
-        
-        if total_questions <= 4 and 'ux' not in answered_categories:
-            return "EXPERIÊNCIA DO USUÁRIO: Como funcionará para diferentes roles (admin/assistant/operador)?"
-        
-        return "ASPECTOS FINAIS: Há requisitos específicos não mencionados ou dependências críticas?"
+        return _FALLBACK_FOCUS
     
     def _is_question_repetitive(self, new_question: str, previous_answers: Dict) -> bool:
         """Verifica se a pergunta é muito similar às já feitas"""
-        new_question_lower = new_question.lower()
-        
         # Palavras-chave principais da nova pergunta
-        new_keywords = set([word for word in new_question_lower.split() 
-                           if len(word) > 3 and word not in ['para', 'esta', 'como', 'qual', 'onde', 'quando']])
+        new_keywords = _keywords(new_question)
+        if not new_keywords:
+            return False
         
-        for prev_question in previous_answers.keys():
-            prev_question_lower = prev_question.lower()
-            
-            # Palavras-chave da pergunta anterior
-            prev_keywords = set([word for word in prev_question_lower.split() 
-                                if len(word) > 3 and word not in ['para', 'esta', 'como', 'qual', 'onde', 'quando']])
-            
+        # Palavras-chave das perguntas anteriores, extraídas uma única vez
+        prev_keyword_sets = [_keywords(prev_question) for prev_question in previous_answers]
+        
+        for prev_keywords in prev_keyword_sets:
             # Verificar sobreposição de palavras-chave relevantes
-            if len(new_keywords) > 0 and len(prev_keywords) > 0:
+            if prev_keywords:
                 overlap = len(new_keywords & prev_keywords)
                 overlap_percentage = overlap / min(len(new_keywords), len(prev_keywords))
                 
                 # Se há 50%+ de sobreposição, é repetitiva
                 if overlap_percentage > 0.5:
-                    logger.info(f"Pergunta repetitiva detectada: {overlap_percentage:.2f} overlap")
+                    logger.info("Pergunta repetitiva detectada: %.2f overlap", overlap_percentage)
                     return True
                     
         return False
     
-    def identify_stakeholders(self, specification_data: Dict) -> Dict:
+    def identify_stakeholders(self, specification_data: SpecData) -> Dict:
         """
         Identifica stakeholders necessários baseado na especificação completa
         """
         try:
             # Extrair informações relevantes
-            answers_text = " ".join(specification_data.get('questions_answers', {}).values())
-            feature_context = specification_data.get('initial_idea', '') + " " + answers_text
+            answers_text = " ".join(specification_data.questions_answers.values())
+            feature_context = specification_data.initial_idea + " " + answers_text
             
             prompt = f"""
-CONTEXTO DA OKTO:
-- Fintech para casas de apostas esportivas
-- Times: Produto, PIX Backend, Internet Banking, Compliance, Financeiro, Suporte, TMS
-
 ESPECIFICAÇÃO COMPLETA:
-Título: {specification_data.get('title', '')}
-Ideia: {specification_data.get('initial_idea', '')}
-Respostas: {json.dumps(specification_data.get('questions_answers', {}), ensure_ascii=False)}
-
-STAKEHOLDERS DISPONÍVEIS NA OKTO:
-- PIX Backend: APIs PIX, integrações bancárias, processamento de pagamentos
-- Internet Banking: Frontend, UX, autenticação, menus por role
-- Compliance: Regulamentações BACEN, auditoria, prevenção à lavagem
-- Financeiro: Fluxo de caixa, conciliação, custos operacionais, tarifas
-- Suporte: Atendimento aos clientes (casas de apostas), documentação
-- TMS: Monitoramento, logs, alertas, infraestrutura
-- Produto: Roadmap, priorização, métricas de negócio
-
-REGRAS:
-1. Seja MUITO criterioso - apenas stakeholders realmente impactados
-2. Considere que nossos clientes são casas de apostas
-3. Analise impactos técnicos, regulatórios e operacionais específicos
-4. Explique claramente POR QUE cada área precisa validar
-
-Retorne JSON válido:
-{
-    "stakeholders": [
-        {
-            "area": "PIX Backend",
-            "reason": "Explicação específica do impacto",
-            "priority": "high|medium|low",
-            "validation_focus": "O que especificamente precisa validar"
-        }
-    ]
-}
+Título: {specification_data.title}
+Ideia: {specification_data.initial_idea}
+Respostas: {orjson.dumps(specification_data.questions_answers).decode('utf-8')}
 """
             
-            response = self.bedrock.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 1000,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
+            result = self._invoke(_STAKEHOLDERS_BODY, prompt)
+            
+            # Resposta estruturada via ferramenta; texto livre só como contingência
+            stakeholders_data = next(
+                (block['input'] for block in result['content'] if block.get('type') == 'tool_use'),
+                None
             )
+            if stakeholders_data is None:
+                stakeholders_data = _extract_json(_response_text(result))
             
-            result = json.loads(response['body'].read())
-            response_text = result['content'][0]['text'].strip()
+            if stakeholders_data is not None:
+                # Validar e filtrar stakeholders
+                valid_stakeholders = []
+                
+                for stakeholder in stakeholders_data.get('stakeholders', []):
+                    if stakeholder.get('area') in _VALID_AREAS:
+                        valid_stakeholders.append(stakeholder)
+                
+                result_data = {"stakeholders": valid_stakeholders}
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Stakeholders identificados: %s", [s['area'] for s in valid_stakeholders])
+                return result_data
             
-            try:
-                # Extrair JSON limpo
-                start = response_text.find('{')
-                end = response_text.rfind('}') + 1
-                if start != -1 and end != -1:
-                    json_str = response_text[start:end]
-                    stakeholders_data = json.loads(json_str)
-                    
-                    # Validar e filtrar stakeholders
-                    valid_stakeholders = []
-                    valid_areas = ["PIX Backend", "Internet Banking", "Compliance", "Financeiro", "Suporte", "TMS", "Produto"]
-                    
-                    for stakeholder in stakeholders_data.get('stakeholders', []):
-                        if stakeholder.get('area') in valid_areas:
-                            valid_stakeholders.append(stakeholder)
-                    
-                    result_data = {"stakeholders": valid_stakeholders}
-                    logger.info(f"Stakeholders identificados: {[s['area'] for s in valid_stakeholders]}")
-                    return result_data
-                    
-            except json.JSONDecodeError as e:
-                logger.warning(f"Erro ao parsear JSON da IA: {e}")
+            logger.warning("Nenhum stakeholder estruturado encontrado na resposta da IA")
                 
             # Fallback inteligente baseado no contexto
             return self._get_fallback_stakeholders(feature_context)
                 
         except Exception as e:
-            logger.error(f"Erro ao identificar stakeholders: {str(e)}")
+            logger.error("Erro ao identificar stakeholders: %s", e)
             return self._get_fallback_stakeholders("")
     
     def _get_fallback_stakeholders(self, feature_context: str) -> Dict:
@@ -239,7 +502,7 @@ Retorne JSON válido:
         context_lower = feature_context.lower()
         
         # Internet Banking - para mudanças de interface/autenticação
-        if any(word in context_lower for word in ['internet banking', 'login', 'facial', 'autenticação', 'interface', 'tela']):
+        if _INTERNET_BANKING_KW.search(context_lower):
             stakeholders.append({
                 "area": "Internet Banking",
                 "reason": "Alterações na interface e autenticação do usuário",
@@ -248,7 +511,7 @@ Retorne JSON válido:
             })
         
         # PIX Backend - para features de pagamento
-        if any(word in context_lower for word in ['pix', 'pagamento', 'transação', 'api']):
+        if _PIX_BACKEND_KW.search(context_lower):
             stakeholders.append({
                 "area": "PIX Backend",
                 "reason": "Alterações em funcionalidades de pagamento",
@@ -257,7 +520,7 @@ Retorne JSON válido:
             })
         
         # Compliance - sempre para segurança
-        if any(word in context_lower for word in ['segurança', 'facial', 'autenticação', 'biometria']):
+        if _COMPLIANCE_KW.search(context_lower):
             stakeholders.append({
                 "area": "Compliance",
                 "reason": "Validação de aspectos de segurança e conformidade",
@@ -266,7 +529,7 @@ Retorne JSON válido:
             })
         
         # TMS - para monitoramento
-        if any(word in context_lower for word in ['monitoramento', 'log', 'infraestrutura']):
+        if _TMS_KW.search(context_lower):
             stakeholders.append({
                 "area": "TMS",
                 "reason": "Monitoramento e infraestrutura da nova funcionalidade",
@@ -284,102 +547,25 @@ Retorne JSON válido:
         
         return {"stakeholders": stakeholders}
     
-    def generate_final_document(self, specification_data: Dict) -> str:
+    def generate_final_document(self, specification_data: SpecData) -> str:
         """
         Gera documento final estruturado da especificação
         """
         try:
-            title = specification_data.get('title', 'Nova Feature')
-            initial_idea = specification_data.get('initial_idea', '')
-            qa_pairs = specification_data.get('questions_answers', {})
-            
             prompt = f"""
-Gere um documento de especificação técnica completo para a OKTO.
-
 DADOS:
-Título: {title}
-Ideia inicial: {initial_idea}
-Perguntas e Respostas: {json.dumps(qa_pairs, ensure_ascii=False)}
-
-CONTEXTO OKTO:
-- Fintech para casas de apostas esportivas
-- Stack: Next.js, Node.js, Keycloak 2FA
-- Sistemas: PIX, pagamentos internos, cobranças, extratos, investimentos, rewards
-- Roles: admin, assistant, operador
-
-ESTRUTURA OBRIGATÓRIA (Markdown):
-
-# SPEC-{specification_data.get('spec_id', 'XXX')[:8]}: {title}
-
-## 📋 Resumo Executivo
-- **Problema:** [problema específico para casas de apostas]
-- **Solução:** [solução técnica proposta]  
-- **Impacto esperado:** [benefícios quantificados]
-- **Complexidade:** [alta/média/baixa com justificativa]
-
-## 🎯 Objetivos de Negócio
-[objetivos específicos e mensuráveis para o contexto OKTO]
-
-## 👥 Impacto nos Clientes (Casas de Apostas)
-[como beneficia nossos clientes especificamente]
-
-## ⚙️ Especificação Técnica
-
-### Sistemas OKTO Impactados
-[PIX Backend, Internet Banking, BackOffice, etc.]
-
-### Funcionalidades Core
-[lista detalhada das funcionalidades]
-
-### Regras de Negócio
-[regras específicas, limites, validações]
-
-### Integrações Necessárias
-[APIs, serviços externos, sistemas internos]
-
-## 🔒 Compliance e Segurança
-[aspectos BACEN, auditoria, segurança]
-
-## 📱 Experiência do Usuário
-
-### Por Role de Usuário
-- **Admin:** [funcionalidades específicas]
-- **Assistant:** [funcionalidades específicas] 
-- **Operador:** [funcionalidades específicas]
-
-### Fluxos Principais
-[jornadas do usuário]
-
-## 🔧 Considerações Técnicas
-[arquitetura, performance, escalabilidade]
-
-## 📊 Métricas de Sucesso
-[KPIs específicos para medir sucesso]
-
-## ⚠️ Riscos e Mitigações
-[riscos técnicos, de negócio e como mitigar]
-
-## 🚀 Plano de Implementação
-[fases, cronograma, dependências]
-
-Seja específico para o contexto OKTO e casas de apostas. Use informações das respostas fornecidas.
+ID: {specification_data.spec_id[-8:]}
+Título: {specification_data.title}
+Ideia inicial: {specification_data.initial_idea}
+Perguntas e Respostas: {orjson.dumps(specification_data.questions_answers).decode('utf-8')}
 """
             
-            response = self.bedrock.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 2500,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
-            
-            result = json.loads(response['body'].read())
-            document = result['content'][0]['text'].strip()
+            result = self._invoke(_DOCUMENT_BODY, prompt)
+            document = _response_text(result)
             
             logger.info("Documento final gerado com sucesso")
             return document
             
         except Exception as e:
-            logger.error(f"Erro ao gerar documento final: {str(e)}")
-            return f"# Erro ao Gerar Documento\n\nErro: {str(e)}\n\nTente novamente ou entre em contato com o suporte."
\ No newline at end of file
+            logger.error("Erro ao gerar documento final: %s", e)
+            return f"# Erro ao Gerar Documento\n\nErro: {str(e)}\n\nTente novamente ou entre em contato com o suporte."
@@ -1,54 +1,53 @@
-import json
+import orjson
 import logging
+import re
 from datetime import datetime, timezone
-from bedrock_client import BedrockClient
+from _common import CORS_HEADERS, create_error_response, is_preflight, parse_body, preflight_response
+from bedrock_client import BedrockClient, SpecData
 
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
 
-# Headers CORS padrão
-CORS_HEADERS = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
-    'Content-Type': 'application/json'
-}
+# Frases que indicam que o usuário reclamou de pergunta repetida
+_REPEAT_RE = re.compile(r'já fez essa pergunta|vc já fez|você já perguntou|pergunta repetida', re.IGNORECASE)
+
+# Regras de validação do request: (campo, regra, mensagem de erro), avaliadas em ordem
+_VALIDATORS = (
+    ('spec_id', bool, 'Campo "spec_id" é obrigatório'),
+    ('current_question', bool, 'Campo "current_question" é obrigatório'),
+    ('answer', bool, 'Campo "answer" é obrigatório'),
+    ('answer', lambda v: len(v) >= 5, 'A resposta deve ter pelo menos 5 caracteres'),
+)
+
+# Envelope fixo da resposta de especificação concluída; só as partes variáveis são serializadas
+_COMPLETED_BODY = (
+    b'{"spec_id":%s,"status":"completed","stakeholders":%s,"final_document":%s,'
+    b'"total_questions":%d,"all_answers":%s,"completed_at":%s,'
+    b'"summary":{"title":%s,"idea":%s,"stakeholder_count":%d,"questions_count":%d}}'
+)
+
+# Cliente criado (e conexão aquecida) uma vez por ambiente de execução e
+# reaproveitado nas invocações seguintes
+BEDROCK_CLIENT = BedrockClient()
+BEDROCK_CLIENT.warm_up()
 
 def lambda_handler(event, context):
     """
     Lambda para processar resposta e gerar próxima pergunta
     """
+    # Ping agendado só para manter o ambiente de execução aquecido
+    if event.get('warmer'):
+        return {'statusCode': 204}
+    
     try:
         # Tratar requisições OPTIONS (preflight)
-        if event.get('httpMethod') == 'OPTIONS':
-            return {
-                'statusCode': 200,
-                'headers': CORS_HEADERS,
-                'body': json.dumps({'message': 'OK'})
-            }
+        if is_preflight(event):
+            return preflight_response()
         
         # Parse flexível do request
-        logger.info(f"Event recebido: {json.dumps(event)}")
-        
-        # Tentar diferentes formatos de parsing
-        if isinstance(event.get('body'), str):
-            # Via API Gateway com body string
-            body = json.loads(event['body'])
-            logger.info("Parsed from string body")
-        elif isinstance(event.get('body'), dict):
-            # Via teste direto com body dict
-            body = event['body']
-            logger.info("Using dict body")
-        elif 'spec_id' in event:
-            # Dados diretos no event (sem wrapper body)
-            body = event
-            logger.info("Using direct event data")
-        else:
-            # Fallback para body dict
-            body = event.get('body', {})
-            logger.info("Using fallback body")
+        logger.debug("Event recebido: %s", event)
+        body = parse_body(event, 'spec_id')
         
-        logger.info(f"Body processado: {json.dumps(body)}")
+        logger.debug("Body processado: %s", body)
         
         # Validar campos obrigatórios com fallbacks inteligentes
         spec_id = body.get('spec_id')
@@ -59,99 +58,41 @@ def lambda_handler(event, context):
         title = body.get('title', 'Feature')
         
         # Log dos campos extraídos
-        logger.info(f"Campos extraídos - spec_id: {spec_id}, current_question: {current_question}, answer: {answer}")
+        logger.info("Campos extraídos - spec_id: %s, current_question: %s, answer: %s", spec_id, current_question, answer)
         
         # Validações
-        if not spec_id:
-            logger.error("spec_id não encontrado")
-            return create_error_response('Campo "spec_id" é obrigatório')
-        
-        if not current_question:
-            logger.error("current_question não encontrado")
-            return create_error_response('Campo "current_question" é obrigatório')
-        
-        if not answer:
-            logger.error("answer não encontrado ou vazio")
-            return create_error_response('Campo "answer" é obrigatório')
-        
-        if len(answer) < 5:
-            logger.error(f"answer muito curto: {len(answer)} caracteres")
-            return create_error_response('A resposta deve ter pelo menos 5 caracteres')
+        fields = {'spec_id': spec_id, 'current_question': current_question, 'answer': answer}
+        for field, rule, message in _VALIDATORS:
+            if not rule(fields[field]):
+                logger.error("Validação de %s falhou: %s", field, message)
+                return create_error_response(message)
         
         # CORREÇÃO: Detectar respostas que indicam repetição
-        if any(phrase in answer.lower() for phrase in ['já fez essa pergunta', 'vc já fez', 'você já perguntou', 'pergunta repetida']):
+        if _REPEAT_RE.search(answer):
             logger.info("Usuário indicou pergunta repetitiva, finalizando especificação")
             # Finalizar especificação quando usuário reclama de repetição
-            spec_data = {
-                'spec_id': spec_id,
-                'title': title,
-                'initial_idea': initial_idea,
-                'questions_answers': previous_answers,
-                'completed_at': datetime.now(timezone.utc).isoformat()
-            }
-            
             try:
-                bedrock_client = BedrockClient()
-                
-                # Identificar stakeholders
-                logger.info("Identificando stakeholders...")
-                stakeholders_result = bedrock_client.identify_stakeholders(spec_data)
-                stakeholders = stakeholders_result.get('stakeholders', [])
-                logger.info(f"Stakeholders identificados: {len(stakeholders)}")
-                
-                # Gerar documento final
-                logger.info("Gerando documento final...")
-                final_document = bedrock_client.generate_final_document(spec_data)
-                logger.info("Documento gerado com sucesso")
-                
-                return {
-                    'statusCode': 200,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({
-                        'spec_id': spec_id,
-                        'status': 'completed',
-                        'stakeholders': stakeholders,
-                        'final_document': final_document,
-                        'total_questions': len(previous_answers),
-                        'all_answers': previous_answers,
-                        'completed_at': spec_data['completed_at'],
-                        'summary': {
-                            'title': title,
-                            'idea': initial_idea,
-                            'stakeholder_count': len(stakeholders),
-                            'questions_count': len(previous_answers)
-                        }
-                    }, ensure_ascii=False)
-                }
-                
+                return complete_specification(BEDROCK_CLIENT, spec_id, title, initial_idea, previous_answers)
+
             except Exception as e:
-                logger.error(f"Erro ao finalizar especificação após repetição: {str(e)}")
+                logger.error("Erro ao finalizar especificação após repetição: %s", e)
                 return create_error_response(f'Erro ao finalizar especificação: {str(e)}')
         
         # Adicionar resposta atual ao histórico
-        updated_answers = previous_answers.copy()
-        updated_answers[current_question] = answer
+        updated_answers = {**previous_answers, current_question: answer}
         
-        logger.info(f"Histórico atualizado: {len(updated_answers)} respostas")
-        
-        # Inicializar cliente Bedrock
-        try:
-            bedrock_client = BedrockClient()
-            logger.info("BedrockClient inicializado com sucesso")
-        except Exception as e:
-            logger.error(f"Erro ao inicializar BedrockClient: {str(e)}")
-            return create_error_response(f'Erro ao conectar com IA: {str(e)}')
+        logger.info("Histórico atualizado: %s respostas", len(updated_answers))
         
         # Gerar próxima pergunta
         try:
             logger.info("Gerando próxima pergunta...")
-            next_question = bedrock_client.ask_specification_question(
+            next_question = BEDROCK_CLIENT.ask_specification_question(
                 context=initial_idea,
                 previous_answers=updated_answers
             )
-            logger.info(f"Próxima pergunta gerada: {next_question}")
+            logger.info("Próxima pergunta gerada: %s", next_question)
         except Exception as e:
-            logger.error(f"Erro ao gerar próxima pergunta: {str(e)}")
+            logger.error("Erro ao gerar próxima pergunta: %s", e)
             return create_error_response(f'Erro na IA: {str(e)}')
         
         # Verificar se especificação está completa
@@ -160,51 +101,11 @@ def lambda_handler(event, context):
         if is_complete:
             logger.info("Especificação marcada como completa")
             # Especificação concluída - identificar stakeholders e gerar documento
-            spec_data = {
-                'spec_id': spec_id,
-                'title': title,
-                'initial_idea': initial_idea,
-                'questions_answers': updated_answers,
-                'completed_at': datetime.now(timezone.utc).isoformat()
-            }
-            
             try:
-                # Identificar stakeholders
-                logger.info("Identificando stakeholders...")
-                stakeholders_result = bedrock_client.identify_stakeholders(spec_data)
-                stakeholders = stakeholders_result.get('stakeholders', [])
-                logger.info(f"Stakeholders identificados: {len(stakeholders)}")
-                
-                # Gerar documento final
-                logger.info("Gerando documento final...")
-                final_document = bedrock_client.generate_final_document(spec_data)
-                logger.info("Documento gerado com sucesso")
-                
-                logger.info(f"Especificação {spec_id} concluída com {len(updated_answers)} perguntas")
-                logger.info(f"Stakeholders identificados: {[s.get('area', 'Unknown') for s in stakeholders]}")
-                
-                return {
-                    'statusCode': 200,
-                    'headers': CORS_HEADERS,
-                    'body': json.dumps({
-                        'spec_id': spec_id,
-                        'status': 'completed',
-                        'stakeholders': stakeholders,
-                        'final_document': final_document,
-                        'total_questions': len(updated_answers),
-                        'all_answers': updated_answers,
-                        'completed_at': spec_data['completed_at'],
-                        'summary': {
-                            'title': title,
-                            'idea': initial_idea,
-                            'stakeholder_count': len(stakeholders),
-                            'questions_count': len(updated_answers)
-                        }
-                    }, ensure_ascii=False)
-                }
-                
+                return complete_specification(BEDROCK_CLIENT, spec_id, title, initial_idea, updated_answers)
+
             except Exception as e:
-                logger.error(f"Erro ao finalizar especificação: {str(e)}")
+                logger.error("Erro ao finalizar especificação: %s", e)
                 return create_error_response(f'Erro ao finalizar especificação: {str(e)}')
         else:
             # Continuar com próxima pergunta
@@ -214,12 +115,12 @@ def lambda_handler(event, context):
             estimated_total = max(5, len(updated_answers) + 1)  # Sempre pelo menos 5, mas pode ajustar se passou
             progress_percentage = min(int((len(updated_answers) / estimated_total) * 100), 95)
             
-            logger.info(f"Especificação {spec_id} - Pergunta {question_number}: {next_question}")
+            logger.info("Especificação %s - Pergunta %s: %s", spec_id, question_number, next_question)
             
             return {
                 'statusCode': 200,
                 'headers': CORS_HEADERS,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'spec_id': spec_id,
                     'status': 'in_progress',
                     'next_question': next_question,
@@ -230,43 +131,72 @@ def lambda_handler(event, context):
                         'estimated_total': estimated_total,
                         'percentage': progress_percentage
                     }
-                }, ensure_ascii=False)
+                }).decode('utf-8')
             }
         
     except Exception as e:
-        logger.error(f"Erro geral na função process_answer: {str(e)}")
-        logger.error(f"Event completo: {json.dumps(event)}")
+        logger.error("Erro geral na função process_answer: %s", e)
+        logger.error("Event completo: %s", event)
         return create_error_response(f'Erro interno: {str(e)}')
 
-def create_error_response(message):
-    """Função helper para criar respostas de erro padronizadas"""
+def complete_specification(bedrock_client, spec_id, title, initial_idea, answers):
+    """Identifica stakeholders, gera o documento final e monta a resposta de especificação concluída"""
+    completed_at = datetime.now(timezone.utc).isoformat()
+    spec_data = SpecData(
+        spec_id=spec_id,
+        title=title,
+        initial_idea=initial_idea,
+        questions_answers=answers,
+        completed_at=completed_at
+    )
+    
+    # Identificar stakeholders e gerar documento final em paralelo
+    logger.info("Identificando stakeholders e gerando documento final...")
+    stakeholders_result, final_document = bedrock_client.finalize(spec_data)
+    stakeholders = stakeholders_result.get('stakeholders', [])
+    logger.info("Documento gerado com sucesso")
+    
+    logger.info("Especificação %s concluída com %s perguntas", spec_id, len(answers))
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Stakeholders identificados: %s", [s.get('area', 'Unknown') for s in stakeholders])
+    
+    dumps = orjson.dumps
     return {
-        'statusCode': 400,
+        'statusCode': 200,
         'headers': CORS_HEADERS,
-        'body': json.dumps({
-            'error': message
-        }, ensure_ascii=False)
+        'body': (_COMPLETED_BODY % (
+            dumps(spec_id),
+            dumps(stakeholders),
+            dumps(final_document),
+            len(answers),
+            dumps(answers),
+            dumps(completed_at),
+            dumps(title),
+            dumps(initial_idea),
+            len(stakeholders),
+            len(answers)
+        )).decode('utf-8')
     }
 
 # Para testar localmente
 if __name__ == "__main__":
     # Simular uma resposta à primeira pergunta
     test_event = {
-        'body': json.dumps({
+        'body': orjson.dumps({
             'spec_id': 'test-123',
             'current_question': 'Como esta feature beneficia as casas de apostas (nossos clientes)?',
             'answer': 'Aumenta a segurança e confiança dos usuários nas casas de apostas, reduzindo fraudes e melhorando a experiência de login',
             'previous_answers': {},
             'initial_idea': 'Implementar reconhecimento facial no login para aumentar segurança',
             'title': 'Reconhecimento Facial'
-        })
+        }).decode('utf-8')
     }
     
     result = lambda_handler(test_event, None)
     print("Status:", result['statusCode'])
     
     if result['statusCode'] == 200:
-        response_data = json.loads(result['body'])
+        response_data = orjson.loads(result['body'])
         print("Status da spec:", response_data.get('status'))
         
         if response_data.get('status') == 'completed':
@@ -1,22 +1,42 @@
-import json
+import orjson
 import uuid
 import logging
-from datetime import datetime
+import os
+import time
+from datetime import datetime, timezone
+from _common import CORS_HEADERS, create_error_response, is_preflight, parse_body, preflight_response
 from bedrock_client import BedrockClient
 
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+
+def _uuid7():
+    """UUID versão 7 (RFC 9562): timestamp em ms nos 48 bits iniciais, IDs ordenáveis por criação"""
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    # Versão 7 e variante RFC 4122
+    value = value & ~(0xF << 76) | 0x7 << 76
+    value = value & ~(0x3 << 62) | 0x2 << 62
+    return uuid.UUID(int=value)
+
+# Cliente criado (e conexão aquecida) uma vez por ambiente de execução e
+# reaproveitado nas invocações seguintes
+BEDROCK_CLIENT = BedrockClient()
+BEDROCK_CLIENT.warm_up()
 
 def lambda_handler(event, context):
     """
     Lambda para iniciar nova especificação de feature
     """
+    # Ping agendado só para manter o ambiente de execução aquecido
+    if event.get('warmer'):
+        return {'statusCode': 204}
+    
     try:
+        # Tratar requisições OPTIONS (preflight)
+        if is_preflight(event):
+            return preflight_response()
+        
         # Parse request
-        if isinstance(event.get('body'), str):
-            body = json.loads(event['body'])
-        else:
-            body = event.get('body', {})
+        body = parse_body(event, 'idea')
             
         # Validar campos obrigatórios
         initial_idea = body.get('idea', '').strip()
@@ -24,39 +44,16 @@ def lambda_handler(event, context):
         title = body.get('title', 'Nova Feature').strip()
         
         if not initial_idea:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type',
-                    'Content-Type': 'application/json'
-                },
-                'body': json.dumps({
-                    'error': 'Campo "idea" é obrigatório'
-                }, ensure_ascii=False)
-            }
+            return create_error_response('Campo "idea" é obrigatório')
         
         if len(initial_idea) < 10:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type',
-                    'Content-Type': 'application/json'
-                },
-                'body': json.dumps({
-                    'error': 'A ideia deve ter pelo menos 10 caracteres'
-                }, ensure_ascii=False)
-            }
+            return create_error_response('A ideia deve ter pelo menos 10 caracteres')
         
         # Gerar ID único
-        spec_id = str(uuid.uuid4())
-        
-        # Inicializar cliente Bedrock
-        bedrock_client = BedrockClient()
+        spec_id = str(_uuid7())
         
         # Gerar primeira pergunta
-        first_question = bedrock_client.ask_specification_question(
+        first_question = BEDROCK_CLIENT.ask_specification_question(
             context=initial_idea,
             previous_answers={}
         )
@@ -67,62 +64,47 @@ def lambda_handler(event, context):
             'title': title,
             'initial_idea': initial_idea,
             'created_by': created_by,
-            'created_at': datetime.utcnow().isoformat(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
             'status': 'in_progress',
             'current_question': first_question,
             'questions_answers': {},
             'question_count': 1
         }
         
-        logger.info(f"Especificação {spec_id} criada por {created_by}")
-        logger.info(f"Primeira pergunta: {first_question}")
+        logger.info("Especificação %s criada por %s", spec_id, created_by)
+        logger.info("Primeira pergunta: %s", first_question)
         
         return {
             'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({
+            'headers': CORS_HEADERS,
+            'body': orjson.dumps({
                 'spec_id': spec_id,
                 'title': title,
                 'first_question': first_question,
                 'question_number': 1,
                 'status': 'started',
                 'created_at': spec_data['created_at']
-            }, ensure_ascii=False)
+            }).decode('utf-8')
         }
         
     except Exception as e:
-        logger.error(f"Erro na função start_specification: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({
-                'error': 'Erro interno do servidor',
-                'details': str(e)
-            }, ensure_ascii=False)
-        }
+        logger.error("Erro na função start_specification: %s", e)
+        return create_error_response('Erro interno do servidor', status_code=500, details=str(e))
 
 # Para testar localmente
 if __name__ == "__main__":
     test_event = {
-        'body': json.dumps({
+        'body': orjson.dumps({
             'idea': 'Implementar PIX agendado para nossos clientes poderem programar pagamentos futuros',
             'created_by': 'test@okto.com',
             'title': 'PIX Agendado'
-        })
+        }).decode('utf-8')
     }
     
     result = lambda_handler(test_event, None)
     print("Status:", result['statusCode'])
     if result['statusCode'] == 200:
-        response_data = json.loads(result['body'])
+        response_data = orjson.loads(result['body'])
         print("Spec ID:", response_data['spec_id'])
         print("Primeira pergunta:", response_data['first_question'])
     else: